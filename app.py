@@ -1,9 +1,13 @@
 # app.py
 import streamlit as st
 import pandas as pd
+import numpy as np
 import pickle
-from sklearn.preprocessing import LabelEncoder
+import os
+import hashlib
+import joblib
 import time
+from form_options import FORM_OPTIONS, optional_columns, training_code
 
 # Page configuration
 st.set_page_config(
@@ -252,27 +256,131 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+# Display names for the model engines train_model.py can produce
+ENGINE_NAMES = {
+    "random_forest": "Random Forest Classifier",
+    "hist_gradient_boosting": "Histogram Gradient Boosting",
+}
+
 # Load the trained model
 @st.cache_resource
 def load_model():
-    return pickle.load(open("model.pkl", "rb"))
+    with open("model.pkl", "rb") as f:
+        raw = f.read()
+    artifact = pickle.loads(raw)
+    # Older artifacts are a bare random forest
+    if not isinstance(artifact, dict):
+        artifact = {"engine": "random_forest", "model": artifact}
+    # Fingerprint that side artifacts must carry to be used with this model
+    artifact["sha256"] = hashlib.sha256(raw).hexdigest()
+    return artifact
+
+model_artifact = load_model()
+model = model_artifact["model"]
+MODEL_ENGINE = model_artifact["engine"]
+MODEL_SHA256 = model_artifact["sha256"]
+# Training categories the form's choices are encoded against
+CATEGORY_CLASSES = model_artifact.get("categories")
+if CATEGORY_CLASSES is None:
+    st.error("model.pkl has no stored category classes; retrain it with train_model.py.")
+    st.stop()
+
+# Test metrics recorded at training time (missing for older artifacts)
+MODEL_METRICS = model_artifact.get("metrics", {})
+
+def metric_text(name, percent=False):
+    value = MODEL_METRICS.get(name)
+    if value is None:
+        return "n/a"
+    return f"{value * 100:.1f}%" if percent else f"{value:.2f}"
+
+def model_architecture_items():
+    # Architecture bullets read from the served model's own parameters
+    params = model.get_params()
+    if MODEL_ENGINE == "hist_gradient_boosting":
+        return [
+            f"Gradient boosting with {getattr(model, 'n_iter_', params['max_iter'])} iterations",
+            f"Up to {params['max_leaf_nodes']} leaves per tree",
+            f"Learning rate of {params['learning_rate']}",
+            "Native categorical splits",
+        ]
+    max_depth = params.get("max_depth")
+    return [
+        f"Random Forest with {params.get('n_estimators')} trees",
+        f"Max depth of {max_depth}" if max_depth is not None else "Unlimited tree depth",
+        f"Min samples split of {params.get('min_samples_split')}",
+    ]
+
+# Number of similar training profiles to show
+SIMILAR_PROFILES_K = 10
 
-model = load_model()
+# Load the similar-profile index (memory-mapped, optional)
+@st.cache_resource
+def load_neighbors():
+    if not os.path.exists("neighbors.joblib"):
+        return None
+    index = joblib.load("neighbors.joblib", mmap_mode="r")
+    # Ignore an index left over from a different model.pkl
+    if index.get("model_sha256") != MODEL_SHA256:
+        return None
+    return index
+
+neighbors_index = load_neighbors()
+if neighbors_index is None and os.path.exists("neighbors.joblib"):
+    st.sidebar.warning("neighbors.joblib was built for a different model.pkl and is ignored. "
+                       "Retrain to rebuild it.")
+
+# Load the precomputed score table (optional, built with train_model.py --score-table)
+@st.cache_resource
+def load_score_table():
+    # Returns the table, or None and the reason it can't be served
+    if not os.path.exists("score_table.joblib"):
+        return None, None
+    table = joblib.load("score_table.joblib", mmap_mode="r")
+    # Only usable if it was computed from the exact model being served
+    if table.get("model_sha256") != MODEL_SHA256:
+        return None, ("was built for a different model.pkl and is ignored. "
+                      "Retrain with --score-table to rebuild it.")
+    # ...and only if its measured error is within the tolerance it was built with
+    if table["observed_max_abs_error"] > table["max_error_tolerance"]:
+        return None, (f"is ignored: observed error {table['observed_max_abs_error']:.3f} exceeds "
+                      f"its tolerance of {table['max_error_tolerance']}.")
+    for axis in table["axes"]:
+        if axis["kind"] == "categorical":
+            axis["index"] = {code: i for i, code in enumerate(axis["codes"])}
+    return table, None
+
+score_table, score_table_problem = load_score_table()
+if score_table_problem:
+    st.sidebar.warning(f"score_table.joblib {score_table_problem}")
+
+def lookup_score(row):
+    # Probability from the score table, or None if the input is outside it
+    cell = []
+    for axis in score_table["axes"]:
+        value = row[axis["feature"]]
+        if axis["kind"] == "categorical":
+            i = axis["index"].get(int(value))
+            if i is None:
+                return None
+        else:
+            edges = axis["edges"]
+            if not edges[0] <= value < edges[-1]:
+                return None
+            i = int(np.searchsorted(edges, value, side="right")) - 1
+        cell.append(i)
+    return float(score_table["probabilities"][tuple(cell)])
 
 # Exchange rate (example: 1 USD = 83 INR)
 USD_TO_INR = 83
 
-# Feature order and encoders
+# Feature order
 correct_feature_order = [
     'age', 'workclass', 'fnlwgt', 'education', 'educational-num',
     'marital-status', 'occupation', 'relationship', 'race', 'gender',
     'capital-gain', 'capital-loss', 'hours-per-week', 'native-country'
 ]
 
-label_encoders = {feature: LabelEncoder() for feature in correct_feature_order 
-                 if feature not in ['age', 'fnlwgt', 'educational-num', 'capital-gain', 
-                                  'capital-loss', 'hours-per-week']}
-
 # JavaScript for fire effect
 FIRE_JS = """
 <script>
@@ -315,13 +423,13 @@ with st.sidebar:
     """, unsafe_allow_html=True)
     
     st.markdown("### 🔍 Model Specifications")
-    st.markdown("""
+    st.markdown(f"""
     <div style='background-color: rgba(108, 92, 231, 0.1); padding: 1rem; border-radius: 8px;'>
         <p style='color:var(--dark-subtext); margin-bottom: 0.5rem;'>
-        <strong>Algorithm:</strong> Random Forest Classifier
+        <strong>Algorithm:</strong> {ENGINE_NAMES.get(MODEL_ENGINE, MODEL_ENGINE)}
         </p>
         <p style='color:var(--dark-subtext); margin-bottom: 0.5rem;'>
-        <strong>Accuracy:</strong> 86.4% (test set)
+        <strong>Accuracy:</strong> {metric_text("accuracy", percent=True)} (test set)
         </p>
         <p style='color:var(--dark-subtext); margin-bottom: 0.5rem;'>
         <strong>Training Data:</strong> US Census Bureau
@@ -373,36 +481,36 @@ with tab1:
             age = st.slider("Age", 17, 90, 30, 
                            help="Select the individual's age in years")
             gender = st.radio("Gender", 
-                             options=["Female", "Male", "Other"], 
+                             options=FORM_OPTIONS['gender'], 
                              help="Select gender identity",
                              horizontal=True)
             marital_status = st.selectbox("Marital Status", 
-                                        options=["Married", "Single", "Divorced", "Widowed", "Separated"],
+                                        options=FORM_OPTIONS['marital-status'],
                                         help="Current marital status")
             relationship = st.selectbox("Relationship Status", 
-                                      options=["Husband", "Wife", "Own-child", "Unmarried", "Other-relative"],
+                                      options=FORM_OPTIONS['relationship'],
                                       help="Relationship status in household")
             race = st.selectbox("Race/Ethnicity", 
-                              options=["White", "Black", "Asian-Pac-Islander", "Amer-Indian-Eskimo", "Other"],
+                              options=FORM_OPTIONS['race'],
                               help="Race or ethnic group")
             
         with col2:
             st.markdown("### 💼 Employment Details")
             workclass = st.selectbox("Employment Sector", 
-                                   options=["Private", "Government", "Self-employed", "Non-profit", "Other"],
+                                   options=FORM_OPTIONS['workclass'],
                                    help="Primary employment sector")
             occupation = st.selectbox("Occupation Category", 
-                                   options=["Tech", "Admin", "Services", "Professional", "Manual-labor", "Other"],
+                                   options=FORM_OPTIONS['occupation'],
                                    help="Primary occupation field")
             education = st.selectbox("Highest Education", 
-                                   options=["HS-grad", "Bachelors", "Masters", "Doctorate", "Some-college", "Other"],
+                                   options=FORM_OPTIONS['education'],
                                    help="Highest level of education completed")
             education_num = st.slider("Years of Education", 1, 20, 10,
                                     help="Total years of formal education")
             hours_per_week = st.slider("Weekly Work Hours", 10, 100, 40,
                                      help="Typical hours worked per week")
             native_country = st.selectbox("Country of Origin", 
-                                        options=["United-States", "Mexico", "India", "Philippines", "Germany", "Other"],
+                                        options=FORM_OPTIONS['native-country'],
                                         help="Country of birth or origin")
             
             st.markdown("### 💰 Financial Information")
@@ -436,25 +544,24 @@ with tab2:
         """, unsafe_allow_html=True)
         
         st.markdown("#### 📈 Performance Metrics")
-        st.markdown("""
+        st.markdown(f"""
         ```python
-        Accuracy: 86.4%
-        Precision: 0.83
-        Recall: 0.62
-        F1 Score: 0.71
-        AUC-ROC: 0.89
+        Accuracy: {metric_text("accuracy", percent=True)}
+        Precision: {metric_text("precision")}
+        Recall: {metric_text("recall")}
+        F1 Score: {metric_text("f1")}
+        AUC-ROC: {metric_text("roc_auc")}
         ```
         """)
     
     with col2:
         st.markdown("#### ⚙️ Technical Details")
-        st.markdown("""
+        architecture_items = "".join(f"<li>{item}</li>" for item in model_architecture_items())
+        st.markdown(f"""
         <div class="feature-card">
             <p style='color:var(--dark-subtext);'><strong>Model Architecture:</strong></p>
             <ul style='color:var(--dark-subtext); padding-left: 1.2rem;'>
-                <li>Random Forest with 100 trees</li>
-                <li>Max depth of 15</li>
-                <li>Min samples split of 5</li>
+                {architecture_items}
             </ul>
             <p style='color:var(--dark-subtext); margin-top: 1rem;'><strong>Data Preprocessing:</strong></p>
             <ul style='color:var(--dark-subtext); padding-left: 1.2rem;'>
@@ -487,10 +594,7 @@ if submitted:
             progress_bar.progress(percent_complete + 1)
         
         try:
-            # Convert inputs to encoded values
-            gender_encoded = 1 if gender == "Male" else (0 if gender == "Female" else 2)
-
-            # Encode categorical features
+            # Categorical choices, encoded with the training categories
             categorical_features = {
                 'workclass': workclass,
                 'education': education,
@@ -498,33 +602,37 @@ if submitted:
                 'occupation': occupation,
                 'relationship': relationship,
                 'race': race,
-                'native-country': native_country
+                'native-country': native_country,
+                'gender': gender
             }
-
-            for feature, value in categorical_features.items():
-                label_encoders[feature].fit([value])
+            encoded = {feature: training_code(feature, value, CATEGORY_CLASSES[feature])
+                       for feature, value in categorical_features.items()}
 
             # Create input data DataFrame
             input_data = pd.DataFrame([[
                 age,
-                label_encoders['workclass'].transform([workclass])[0],
+                encoded['workclass'],
                 fnlwgt,
-                label_encoders['education'].transform([education])[0],
+                encoded['education'],
                 education_num,
-                label_encoders['marital-status'].transform([marital_status])[0],
-                label_encoders['occupation'].transform([occupation])[0],
-                label_encoders['relationship'].transform([relationship])[0],
-                label_encoders['race'].transform([race])[0],
-                gender_encoded,
+                encoded['marital-status'],
+                encoded['occupation'],
+                encoded['relationship'],
+                encoded['race'],
+                encoded['gender'],
                 capital_gain,
                 capital_loss,
                 hours_per_week,
-                label_encoders['native-country'].transform([native_country])[0]
+                encoded['native-country']
             ]], columns=correct_feature_order)
 
-            # Make prediction
-            prediction = model.predict(input_data)[0]
-            probability = model.predict_proba(input_data)[0][1]
+            # Make prediction, from the score table when the input is covered
+            probability = lookup_score(input_data.iloc[0]) if score_table is not None else None
+            if probability is not None:
+                prediction = int(probability > 0.5)
+            else:
+                prediction = model.predict(input_data)[0]
+                probability = model.predict_proba(input_data)[0][1]
             
             st.success("Analysis Complete!")
             st.balloons()
@@ -586,6 +694,52 @@ if submitted:
                 </div>
                 """, unsafe_allow_html=True)
             
+            # Similar training profiles and their outcome mix
+            tree = None
+            if neighbors_index is not None:
+                # Search on the same encoded input the model saw. Inputs with no
+                # training equivalent are left out, using the tree training prebuilt
+                # without those columns.
+                query_row = input_data.iloc[0]
+                unmatched = [col for col, classes in neighbors_index["categories"].items()
+                             if query_row[col] == len(classes)]
+                all_columns = neighbors_index["columns"]
+                columns = [col for col in all_columns if col not in unmatched]
+                tree = neighbors_index["trees"].get(tuple(col for col in neighbors_index["optional_columns"]
+                                                          if col in unmatched))
+
+            if tree is not None:
+                idx = [all_columns.index(col) for col in columns]
+                query = ((query_row[columns].to_numpy(dtype=float) - neighbors_index["mean"][idx])
+                         / neighbors_index["scale"][idx]).reshape(1, -1)
+                _, neighbor_idx = tree.query(query, k=SIMILAR_PROFILES_K)
+                neighbor_idx = neighbor_idx[0]
+
+                similar = pd.DataFrame(neighbors_index["rows"][neighbor_idx],
+                                       columns=neighbors_index["columns"])
+                for col, classes in neighbors_index["categories"].items():
+                    similar[col] = [classes[int(code)] for code in similar[col]]
+                labels = neighbors_index["labels"][neighbor_idx]
+                similar["income"] = [neighbors_index["label_names"][int(label)] for label in labels]
+                high_share = (labels == 1).mean()
+
+                st.markdown("### 👥 People With Similar Profiles")
+                st.markdown(f"""
+                <div class="feature-card">
+                    <p style='color:var(--dark-subtext); margin:0;'>
+                        Of the <strong>{len(labels)}</strong> most similar people in the training data,
+                        <strong style='color:var(--success);'>{high_share*100:.0f}%</strong> earn &gt;$50K/year and
+                        <strong style='color:var(--danger);'>{(1-high_share)*100:.0f}%</strong> earn ≤$50K/year.
+                    </p>
+                </div>
+                """, unsafe_allow_html=True)
+                st.dataframe(similar[['age', 'education', 'occupation', 'marital-status',
+                                      'gender', 'hours-per-week', 'income']],
+                             use_container_width=True, hide_index=True)
+                if unmatched:
+                    st.caption("Not matched on (no equivalent in the training data): "
+                               + ", ".join(unmatched))
+
             # Add recommendations section
             st.markdown("### 📝 Personalized Recommendations")
             if prediction == 1:
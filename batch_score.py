@@ -0,0 +1,139 @@
+# batch_score.py
+#
+# Out-of-core batch scorer for large employee extracts.
+#
+# The input CSV is streamed in chunks; chunks are scored by a pool of worker
+# processes that each load model.pkl once, and predictions are written to the
+# output file in input order. At most a few chunks per worker are in flight at
+# any time, so memory stays bounded regardless of the input size.
+#
+# Usage:
+#   python batch_score.py employees.csv predictions.csv --workers 8 --chunksize 100000
+
+import argparse
+import os
+import pickle
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Feature order the model was trained on (same layout as app.py)
+correct_feature_order = [
+    'age', 'workclass', 'fnlwgt', 'education', 'educational-num',
+    'marital-status', 'occupation', 'relationship', 'race', 'gender',
+    'capital-gain', 'capital-loss', 'hours-per-week', 'native-country'
+]
+
+# Per-worker state, filled in by init_worker
+_model = None
+_categories = None
+_label_names = None
+
+
+def load_artifact(path):
+    with open(path, "rb") as f:
+        artifact = pickle.load(f)
+    # Older artifacts are a bare random forest
+    if not isinstance(artifact, dict):
+        artifact = {"engine": "random_forest", "model": artifact}
+    return artifact
+
+
+def init_worker(model_path):
+    # Runs once per worker process: load the model a single time
+    global _model, _categories, _label_names
+    artifact = load_artifact(model_path)
+    _model = artifact["model"]
+    # Income labels for the class codes; older artifacts only give raw codes
+    _label_names = artifact.get("label_names")
+    # Class strings are stripped the same way as the input values
+    _categories = {
+        col: {str(value).strip(): code for code, value in enumerate(classes)}
+        for col, classes in artifact.get("categories", {}).items()
+    }
+
+
+def encode_chunk(chunk):
+    # Select the model's features and label-encode raw string columns
+    features = chunk[correct_feature_order].copy()
+    for col in correct_feature_order:
+        if pd.api.types.is_numeric_dtype(features[col]):
+            continue
+        if col not in _categories:
+            raise ValueError(
+                f"Column '{col}' holds raw strings but the model artifact has no category "
+                "classes for it; retrain with the current train_model.py or pass an "
+                "already label-encoded extract"
+            )
+        # Unknown categories become -1
+        features[col] = features[col].astype(str).str.strip().map(_categories[col]).fillna(-1).astype(np.int64)
+    return features
+
+
+def score_chunk(chunk, id_column):
+    features = encode_chunk(chunk)
+    result = pd.DataFrame(index=chunk.index)
+    if id_column:
+        result[id_column] = chunk[id_column].values
+    # One pass through the ensemble for both outputs
+    proba = _model.predict_proba(features)
+    codes = _model.classes_.take(proba.argmax(1))
+    result["prediction"] = np.asarray(_label_names, dtype=object)[codes] if _label_names else codes
+    result["probability"] = proba[:, 1]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a large CSV extract with model.pkl")
+    parser.add_argument("input", help="Input CSV with the model's feature columns")
+    parser.add_argument("output", help="Output CSV for predictions (written in input order)")
+    parser.add_argument("--model", default="model.pkl", help="Trained model artifact")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Number of worker processes")
+    parser.add_argument("--chunksize", type=int, default=100000,
+                        help="Rows per chunk")
+    parser.add_argument("--max-in-flight", type=int, default=None,
+                        help="Chunks queued at once (default: 2 per worker)")
+    parser.add_argument("--id-column", default=None,
+                        help="Input column copied through to the output")
+    args = parser.parse_args()
+
+    max_in_flight = args.max_in_flight or 2 * args.workers
+    usecols = correct_feature_order + ([args.id_column] if args.id_column else [])
+
+    start = time.perf_counter()
+    rows = 0
+    header = True
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(args.model,)) as pool, \
+            open(args.output, "w", newline="") as out:
+        pending = deque()
+
+        def write_oldest():
+            nonlocal rows, header
+            result = pending.popleft().result()
+            result.to_csv(out, index=False, header=header)
+            header = False
+            rows += len(result)
+
+        reader = pd.read_csv(args.input, usecols=usecols, chunksize=args.chunksize,
+                             skipinitialspace=True)
+        for chunk in reader:
+            chunk.columns = chunk.columns.str.strip()
+            pending.append(pool.submit(score_chunk, chunk, args.id_column))
+            # Bound memory: wait for the oldest chunk before reading further
+            if len(pending) >= max_in_flight:
+                write_oldest()
+        while pending:
+            write_oldest()
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ Scored {rows:,} rows in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):,.0f} rows/s)")
+    print(f"🎉 Predictions saved as '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
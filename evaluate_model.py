@@ -0,0 +1,205 @@
+# evaluate_model.py
+#
+# Evaluation stage used by train_model.py. Every metric family runs as its own
+# job on a pool of worker processes, and all randomness comes from a single
+# seed, so repeat runs give identical numbers regardless of the worker count.
+
+import time
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.calibration import calibration_curve
+from sklearn.metrics import (
+    accuracy_score, average_precision_score, brier_score_loss, confusion_matrix,
+    f1_score, precision_recall_curve, precision_recall_fscore_support,
+    precision_score, recall_score, roc_auc_score, roc_curve,
+)
+
+# Columns reported per group
+GROUP_COLUMNS = ['gender', 'race', 'native-country']
+
+# Bootstrap replicates per job; fixed so results don't depend on worker count
+BOOTSTRAP_BATCH = 100
+
+
+def _timed(stage, func, *args):
+    # Run one stage in a worker and report how long it took
+    start = time.perf_counter()
+    result = func(*args)
+    return stage, result, time.perf_counter() - start
+
+
+def classification_metrics(y_true, y_pred):
+    precision, recall, f1, support = precision_recall_fscore_support(y_true, y_pred, labels=[0, 1])
+    return {
+        "accuracy": accuracy_score(y_true, y_pred),
+        "confusion_matrix": confusion_matrix(y_true, y_pred, labels=[0, 1]).tolist(),
+        "per_class": {
+            str(label): {"precision": float(precision[i]), "recall": float(recall[i]),
+                         "f1": float(f1[i]), "support": int(support[i])}
+            for i, label in enumerate([0, 1])
+        },
+        "precision": precision_score(y_true, y_pred, zero_division=0),
+        "recall": recall_score(y_true, y_pred, zero_division=0),
+        "f1": f1_score(y_true, y_pred, zero_division=0),
+    }
+
+
+def curve_metrics(y_true, y_prob):
+    fpr, tpr, roc_thresholds = roc_curve(y_true, y_prob)
+    precision, recall, pr_thresholds = precision_recall_curve(y_true, y_prob)
+    return {
+        "roc_auc": roc_auc_score(y_true, y_prob),
+        "roc_curve": {"fpr": fpr.tolist(), "tpr": tpr.tolist(),
+                      "thresholds": np.clip(roc_thresholds, 0, 1).tolist()},
+        "average_precision": average_precision_score(y_true, y_prob),
+        "pr_curve": {"precision": precision.tolist(), "recall": recall.tolist(),
+                     "thresholds": pr_thresholds.tolist()},
+    }
+
+
+def calibration_metrics(y_true, y_prob, n_bins=10):
+    prob_true, prob_pred = calibration_curve(y_true, y_prob, n_bins=n_bins, strategy="uniform")
+    return {
+        "brier_score": brier_score_loss(y_true, y_prob),
+        "n_bins": n_bins,
+        "fraction_positive": prob_true.tolist(),
+        "mean_predicted": prob_pred.tolist(),
+    }
+
+
+def group_metrics(groups, names, y_true, y_pred, y_prob):
+    # Metrics for each value of one sensitive column
+    result = {}
+    for code in np.unique(groups):
+        mask = groups == code
+        yt, yp = y_true[mask], y_pred[mask]
+        name = names[int(code)] if names is not None and 0 <= code < len(names) else str(code)
+        result[name] = {
+            "n": int(mask.sum()),
+            "accuracy": accuracy_score(yt, yp),
+            "precision": precision_score(yt, yp, zero_division=0),
+            "recall": recall_score(yt, yp, zero_division=0),
+            "f1": f1_score(yt, yp, zero_division=0),
+            "positive_rate": float(yp.mean()),
+            # AUC is undefined when a group holds only one class
+            "roc_auc": roc_auc_score(yt, y_prob[mask]) if len(np.unique(yt)) == 2 else None,
+        }
+    return result
+
+
+def bootstrap_batch(seed_seq, n_reps, y_true, y_pred, y_prob):
+    # Metrics on n_reps resamples drawn from this batch's own seed
+    rng = np.random.default_rng(seed_seq)
+    n = len(y_true)
+    reps = {"accuracy": [], "precision": [], "recall": [], "f1": [], "roc_auc": []}
+    for _ in range(n_reps):
+        idx = rng.integers(0, n, size=n)
+        yt, yp = y_true[idx], y_pred[idx]
+        reps["accuracy"].append(accuracy_score(yt, yp))
+        reps["precision"].append(precision_score(yt, yp, zero_division=0))
+        reps["recall"].append(recall_score(yt, yp, zero_division=0))
+        reps["f1"].append(f1_score(yt, yp, zero_division=0))
+        reps["roc_auc"].append(roc_auc_score(yt, y_prob[idx]) if len(np.unique(yt)) == 2 else np.nan)
+    return reps
+
+
+def evaluate(model, X_test, y_test, category_classes=None, n_jobs=-1, n_bootstrap=1000,
+             seed=42, confidence=0.95):
+    """Run the full evaluation in parallel and return a JSON-serialisable report."""
+    timings = {}
+
+    start = time.perf_counter()
+    y_prob_all = model.predict_proba(X_test)
+    y_pred = model.classes_.take(np.argmax(y_prob_all, axis=1))
+    y_prob = y_prob_all[:, 1]
+    y_true = np.asarray(y_test)
+    timings["predict"] = time.perf_counter() - start
+
+    # One job per stage, bootstrap split into fixed-size seeded batches
+    jobs = [
+        delayed(_timed)("classification", classification_metrics, y_true, y_pred),
+        delayed(_timed)("curves", curve_metrics, y_true, y_prob),
+        delayed(_timed)("calibration", calibration_metrics, y_true, y_prob),
+    ]
+    for col in GROUP_COLUMNS:
+        if col in X_test.columns:
+            names = (category_classes or {}).get(col)
+            jobs.append(delayed(_timed)(f"groups:{col}", group_metrics,
+                                        X_test[col].to_numpy(), names, y_true, y_pred, y_prob))
+    batch_sizes = [min(BOOTSTRAP_BATCH, n_bootstrap - i) for i in range(0, n_bootstrap, BOOTSTRAP_BATCH)]
+    seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    for i, (seed_seq, size) in enumerate(zip(seeds, batch_sizes)):
+        jobs.append(delayed(_timed)(f"bootstrap:{i}", bootstrap_batch,
+                                    seed_seq, size, y_true, y_pred, y_prob))
+
+    start = time.perf_counter()
+    results = Parallel(n_jobs=n_jobs)(jobs)
+    timings["parallel_wall"] = time.perf_counter() - start
+
+    # Collect results in job order so the report is deterministic
+    report = {"groups": {}}
+    bootstrap = {}
+    bootstrap_worker_total = 0.0
+    bootstrap_longest = 0.0
+    for stage, result, elapsed in results:
+        if stage.startswith("bootstrap:"):
+            for metric, values in result.items():
+                bootstrap.setdefault(metric, []).extend(values)
+            bootstrap_worker_total += elapsed
+            bootstrap_longest = max(bootstrap_longest, elapsed)
+            continue
+        timings[stage] = elapsed
+        if stage.startswith("groups:"):
+            report["groups"][stage.split(":", 1)[1]] = result
+        else:
+            report[stage] = result
+    # Batches overlap across workers: report summed worker time and the slowest batch
+    timings["bootstrap_worker_total"] = bootstrap_worker_total
+    timings["bootstrap_longest_batch"] = bootstrap_longest
+
+    alpha = (1 - confidence) / 2
+    point = {
+        "accuracy": report["classification"]["accuracy"],
+        "precision": report["classification"]["precision"],
+        "recall": report["classification"]["recall"],
+        "f1": report["classification"]["f1"],
+        "roc_auc": report["curves"]["roc_auc"],
+    }
+    report["bootstrap"] = {
+        "n_resamples": n_bootstrap,
+        "confidence": confidence,
+        "intervals": {
+            metric: _interval(point[metric], values, alpha)
+            for metric, values in bootstrap.items()
+        },
+    }
+    report["seed"] = seed
+    report["n_test"] = int(len(y_true))
+    report["timings_s"] = timings
+    return _to_builtin(report)
+
+
+def _interval(estimate, values, alpha):
+    # Percentile interval; None when every resample was undefined (e.g. one-class AUC)
+    values = np.asarray(values, dtype=float)
+    if np.isnan(values).all():
+        return {"estimate": estimate, "lower": None, "upper": None}
+    return {
+        "estimate": estimate,
+        "lower": float(np.nanquantile(values, alpha)),
+        "upper": float(np.nanquantile(values, 1 - alpha)),
+    }
+
+
+def _to_builtin(obj):
+    # Make numpy scalars JSON-serialisable
+    if isinstance(obj, dict):
+        return {str(k): _to_builtin(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_to_builtin(v) for v in obj]
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    # NaN is not valid JSON
+    if isinstance(obj, float) and np.isnan(obj):
+        return None
+    return obj
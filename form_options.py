@@ -0,0 +1,111 @@
+# form_options.py
+#
+# Options offered by app.py's form and the training-data category each one
+# stands for. app.py (model input, similar profiles) and train_model.py
+# (similar-profile trees, score table) all encode a form submission through
+# this one mapping.
+
+# Choices shown for each categorical input, in display order
+FORM_OPTIONS = {
+    'workclass': ["Private", "Government", "Self-employed", "Non-profit", "Other"],
+    'education': ["HS-grad", "Bachelors", "Masters", "Doctorate", "Some-college", "Other"],
+    'marital-status': ["Married", "Single", "Divorced", "Widowed", "Separated"],
+    'occupation': ["Tech", "Admin", "Services", "Professional", "Manual-labor", "Other"],
+    'relationship': ["Husband", "Wife", "Own-child", "Unmarried", "Other-relative"],
+    'race': ["White", "Black", "Asian-Pac-Islander", "Amer-Indian-Eskimo", "Other"],
+    'gender': ["Female", "Male", "Other"],
+    'native-country': ["United-States", "Mexico", "India", "Philippines", "Germany", "Other"],
+}
+
+# Training category for each form option. Broad form choices map to the
+# closest (or most common) census category; "Other" maps to the census "?"
+# bucket where there is one. None means the training data has no equivalent.
+FORM_TO_TRAINING = {
+    'workclass': {
+        "Private": "Private",
+        "Government": "Local-gov",
+        "Self-employed": "Self-emp-not-inc",
+        "Non-profit": "Private",
+        "Other": "?",
+    },
+    'education': {
+        "HS-grad": "HS-grad",
+        "Bachelors": "Bachelors",
+        "Masters": "Masters",
+        "Doctorate": "Doctorate",
+        "Some-college": "Some-college",
+        "Other": "Assoc-voc",
+    },
+    'marital-status': {
+        "Married": "Married-civ-spouse",
+        "Single": "Never-married",
+        "Divorced": "Divorced",
+        "Widowed": "Widowed",
+        "Separated": "Separated",
+    },
+    'occupation': {
+        "Tech": "Tech-support",
+        "Admin": "Adm-clerical",
+        "Services": "Other-service",
+        "Professional": "Prof-specialty",
+        "Manual-labor": "Handlers-cleaners",
+        "Other": "?",
+    },
+    'relationship': {
+        "Husband": "Husband",
+        "Wife": "Wife",
+        "Own-child": "Own-child",
+        "Unmarried": "Unmarried",
+        "Other-relative": "Other-relative",
+    },
+    'race': {
+        "White": "White",
+        "Black": "Black",
+        "Asian-Pac-Islander": "Asian-Pac-Islander",
+        "Amer-Indian-Eskimo": "Amer-Indian-Eskimo",
+        "Other": "Other",
+    },
+    'gender': {
+        "Female": "Female",
+        "Male": "Male",
+        "Other": None,
+    },
+    'native-country': {
+        "United-States": "United-States",
+        "Mexico": "Mexico",
+        "India": "India",
+        "Philippines": "Philippines",
+        "Germany": "Germany",
+        "Other": "?",
+    },
+}
+
+
+def training_code(col, option, classes):
+    """Label code of a form option among the training classes of ``col``.
+
+    Options without a training equivalent get ``len(classes)``, a code the
+    model never saw during training.
+    """
+    target = FORM_TO_TRAINING[col][option]
+    stripped = [str(c).strip() for c in classes]
+    if target is None or target not in stripped:
+        return len(classes)
+    return stripped.index(target)
+
+
+def optional_columns():
+    # Columns where some form option has no training equivalent
+    return [col for col, mapping in FORM_TO_TRAINING.items() if None in mapping.values()]
+
+
+def check_mapping(category_classes):
+    # Fail fast if the training data lacks a category the form maps onto
+    missing = []
+    for col, mapping in FORM_TO_TRAINING.items():
+        stripped = {str(c).strip() for c in category_classes[col]}
+        missing += [f"{col}={target}" for target in mapping.values()
+                    if target is not None and target not in stripped]
+    if missing:
+        raise ValueError("Form options map to categories missing from the training data: "
+                         + ", ".join(sorted(set(missing))))
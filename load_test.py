@@ -0,0 +1,316 @@
+# load_test.py
+#
+# Concurrent load generator for a locally running app.py instance.
+#
+# Each virtual user opens its own Streamlit websocket session, renders the
+# form once to discover the widgets and their option lists, and then keeps
+# submitting randomized (but valid) form payloads. Concurrency is stepped up
+# level by level and throughput, latency percentiles and error rates are
+# reported for each step, so the saturation point of one instance can be read
+# off the table.
+#
+# Usage:
+#   streamlit run app.py --server.headless true      # in another shell
+#   python load_test.py --users 1 2 4 8 16 32 --duration 30
+#
+#   # or let the harness start (and stop) the instance itself
+#   python load_test.py --start --users 1 4 16 64
+#
+# Note: app.py plays a ~2 s progress animation before every prediction, so a
+# single user cannot exceed ~0.5 predictions/s; compare levels against that.
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+from tornado.websocket import websocket_connect
+from streamlit.proto.Alert_pb2 import Alert
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+# Form widgets we know how to fill in
+INPUT_WIDGETS = ("slider", "selectbox", "radio", "number_input")
+
+# Ranges for the free-form number inputs (they have no max in the UI)
+NUMBER_INPUT_RANGES = {
+    "Capital Gains ($)": (0, 99999),
+    "Capital Losses ($)": (0, 4356),
+    "Final Weight": (12285, 1490400),
+}
+
+# Financial inputs that real form traffic mostly leaves at their default of 0
+FINANCIAL_INPUTS = ("Capital Gains ($)", "Capital Losses ($)")
+
+
+def wait_for_health(base_url, timeout):
+    # Poll the Streamlit health endpoint until the server answers
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(base_url + "/_stcore/health", timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"App at {base_url} did not become healthy within {timeout}s")
+
+
+def start_instance(port):
+    # Launch app.py headless on the given port
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    return subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", app_path,
+         "--server.headless", "true",
+         "--server.port", str(port),
+         "--browser.gatherUsageStats", "false"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def percentile(sorted_values, pct):
+    # Nearest-rank percentile of an already sorted list
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, int(round(pct / 100.0 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class VirtualUser:
+    """One browser-like websocket session against the app."""
+
+    def __init__(self, ws_url, rng, request_timeout, nonzero_financial):
+        self.ws_url = ws_url
+        self.rng = rng
+        self.request_timeout = request_timeout
+        self.nonzero_financial = nonzero_financial
+        self.conn = None
+        self.widgets = {}
+        self.submit_id = None
+        self.cache = {}
+
+    async def connect(self):
+        self.conn = await websocket_connect(self.ws_url, subprotocols=["streamlit"])
+        # First render: no widget state, just discover the form
+        await self.rerun([])
+        if self.submit_id is None:
+            raise RuntimeError("Prediction form not found in the rendered app")
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+
+    async def rerun(self, widget_states):
+        # Send a rerun with the given widget states and wait for the script to finish.
+        # Returns True when the run rendered an error.
+        back_msg = BackMsg()
+        back_msg.rerun_script.query_string = ""
+        back_msg.rerun_script.widget_states.widgets.extend(widget_states)
+        await self.conn.write_message(back_msg.SerializeToString(), binary=True)
+
+        failed = False
+        while True:
+            raw = await asyncio.wait_for(self.conn.read_message(), self.request_timeout)
+            if raw is None:
+                raise ConnectionError("Websocket closed by server")
+            msg = ForwardMsg()
+            msg.ParseFromString(raw)
+
+            # Resolve cached message references the server assumes we kept
+            if msg.metadata.cacheable:
+                self.cache[msg.hash] = msg
+            if msg.WhichOneof("type") == "ref_hash":
+                msg = self.cache.get(msg.ref_hash, msg)
+
+            kind = msg.WhichOneof("type")
+            if kind == "script_finished":
+                if msg.script_finished != ForwardMsg.FINISHED_SUCCESSFULLY:
+                    failed = True
+                return failed
+            if kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+                element = msg.delta.new_element
+                element_type = element.WhichOneof("type")
+                if element_type == "exception":
+                    failed = True
+                elif element_type == "alert" and element.alert.format == Alert.ERROR:
+                    failed = True
+                elif element_type in INPUT_WIDGETS:
+                    widget = getattr(element, element_type)
+                    self.widgets[widget.id] = (element_type, widget)
+                elif element_type == "button" and element.button.is_form_submitter:
+                    self.submit_id = element.button.id
+
+    def random_payload(self):
+        # Random valid value for every form widget, drawn from the UI's own options
+        states = []
+        for widget_id, (element_type, widget) in self.widgets.items():
+            state = WidgetState(id=widget_id)
+            if element_type == "slider":
+                low, high = int(widget.min), int(widget.max)
+                state.double_array_value.data.append(float(self.rng.randint(low, high)))
+            elif element_type == "selectbox":
+                index = self.rng.randrange(len(widget.options))
+                # Newer Streamlit versions key selectboxes by value, older by index
+                if "raw_value" in widget.DESCRIPTOR.fields_by_name:
+                    state.string_value = widget.options[index]
+                else:
+                    state.int_value = index
+            elif element_type == "radio":
+                state.int_value = self.rng.randrange(len(widget.options))
+            elif element_type == "number_input":
+                if widget.label in FINANCIAL_INPUTS and self.rng.random() >= self.nonzero_financial:
+                    state.int_value = 0
+                else:
+                    low, high = NUMBER_INPUT_RANGES.get(widget.label, (int(widget.min), int(widget.min) + 1000))
+                    state.int_value = self.rng.randint(low, high)
+            states.append(state)
+        states.append(WidgetState(id=self.submit_id, trigger_value=True))
+        return states
+
+
+async def run_user(ws_url, seed, request_timeout, nonzero_financial, stop_at, results):
+    # Keep one virtual user submitting until the level's time is up.
+    # Failed sessions are recorded and replaced, so offered load stays constant.
+    rng = random.Random(seed)
+    user = VirtualUser(ws_url, rng, request_timeout, nonzero_financial)
+    connected = False
+    try:
+        while time.monotonic() < stop_at:
+            if not connected:
+                try:
+                    await asyncio.wait_for(user.connect(), request_timeout)
+                    connected = True
+                except Exception as e:
+                    results.append((None, f"connect: {e.__class__.__name__}"))
+                    user.close()
+                    user = VirtualUser(ws_url, rng, request_timeout, nonzero_financial)
+                    # Brief pause so a refusing server isn't hammered in a tight loop
+                    await asyncio.sleep(min(1.0, max(0.0, stop_at - time.monotonic())))
+                    continue
+
+            start = time.perf_counter()
+            try:
+                failed = await user.rerun(user.random_payload())
+            except Exception as e:
+                results.append((None, e.__class__.__name__))
+                # The session may be mid-run or closed; start a fresh one
+                user.close()
+                user = VirtualUser(ws_url, rng, request_timeout, nonzero_financial)
+                connected = False
+                continue
+            elapsed = time.perf_counter() - start
+            results.append((elapsed, "app error" if failed else None))
+    finally:
+        user.close()
+
+
+async def run_level(ws_url, users, duration, request_timeout, nonzero_financial, seed):
+    results = []
+    started = time.monotonic()
+    stop_at = started + duration
+    await asyncio.gather(*[
+        run_user(ws_url, seed * 100003 + i, request_timeout, nonzero_financial, stop_at, results)
+        for i in range(users)
+    ])
+    wall = time.monotonic() - started
+
+    ok = sorted(latency for latency, error in results if error is None)
+    errors = {}
+    for _, error in results:
+        if error is not None:
+            errors[error] = errors.get(error, 0) + 1
+    total = len(results)
+    return {
+        "users": users,
+        "requests": total,
+        "ok": len(ok),
+        "errors": errors,
+        "error_rate": (total - len(ok)) / total if total else 0.0,
+        "throughput_rps": len(ok) / wall if wall else 0.0,
+        "p50_s": percentile(ok, 50),
+        "p90_s": percentile(ok, 90),
+        "p95_s": percentile(ok, 95),
+        "p99_s": percentile(ok, 99),
+        "max_s": ok[-1] if ok else float("nan"),
+    }
+
+
+def find_saturation(levels, tolerance):
+    # First level where adding users stops buying throughput
+    for prev, cur in zip(levels, levels[1:]):
+        if prev["throughput_rps"] <= 0:
+            continue
+        gain = cur["throughput_rps"] / prev["throughput_rps"] - 1
+        if gain < tolerance or cur["error_rate"] > 0.01:
+            return prev["users"]
+    return None
+
+
+def print_table(levels):
+    print(f"{'users':>6} {'reqs':>6} {'rps':>8} {'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'err%':>6}")
+    for lv in levels:
+        print(f"{lv['users']:>6} {lv['requests']:>6} {lv['throughput_rps']:>8.2f} "
+              f"{lv['p50_s']:>8.3f} {lv['p90_s']:>8.3f} {lv['p95_s']:>8.3f} {lv['p99_s']:>8.3f} "
+              f"{lv['error_rate'] * 100:>6.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent load test for a local app.py instance")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32],
+                        help="Concurrency levels to step through")
+    parser.add_argument("--duration", type=float, default=30.0,
+                        help="Seconds to run each concurrency level")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="Per-request timeout in seconds")
+    parser.add_argument("--nonzero-financial", type=float, default=0.1,
+                        help="Share of requests with nonzero capital gain/loss (form default is 0)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", action="store_true",
+                        help="Start app.py locally for the run and stop it afterwards")
+    parser.add_argument("--saturation-gain", type=float, default=0.1,
+                        help="Throughput gain below which a level counts as saturated")
+    parser.add_argument("--json", dest="json_path", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    base_url = f"http://{args.host}:{args.port}"
+    ws_url = f"ws://{args.host}:{args.port}/_stcore/stream"
+
+    server = start_instance(args.port) if args.start else None
+    try:
+        wait_for_health(base_url, timeout=60 if args.start else 5)
+        levels = []
+        for users in args.users:
+            print(f"⏱️  {users} concurrent users for {args.duration:.0f}s ...")
+            levels.append(asyncio.run(run_level(ws_url, users, args.duration, args.timeout,
+                                                args.nonzero_financial, args.seed)))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print()
+    print_table(levels)
+    saturation = find_saturation(levels, args.saturation_gain)
+    if saturation is None:
+        print("\n📈 No saturation reached; try higher --users levels")
+    else:
+        print(f"\n📉 Throughput saturates at about {saturation} concurrent users")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump({"levels": levels, "saturation_users": saturation}, f, indent=2)
+        print(f"📝 Results written to '{args.json_path}'")
+
+
+if __name__ == "__main__":
+    main()
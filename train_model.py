@@ -1,14 +1,48 @@
 
 # train_model.py
 
+import argparse
+import hashlib
+import itertools
+import json
+import time
 import pandas as pd
+import numpy as np
 from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.neighbors import BallTree
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+import joblib
 import pickle
+from evaluate_model import evaluate
+from form_options import FORM_OPTIONS, check_mapping, optional_columns, training_code
+
+# Command-line options
+parser = argparse.ArgumentParser(description="Train the salary prediction model")
+parser.add_argument("--data", default=r"C:\Users\ASUS\Downloads\adult 3.csv",
+                    help="Path to the adult census CSV")
+parser.add_argument("--engine", choices=["random_forest", "hist_gradient_boosting"],
+                    default="random_forest", help="Model engine to train and save")
+parser.add_argument("--no-compare", action="store_true",
+                    help="Skip the side-by-side engine comparison report")
+parser.add_argument("--no-neighbors", action="store_true",
+                    help="Skip building the similar-profile lookup index")
+parser.add_argument("--score-table", action="store_true",
+                    help="Precompute a dense score table over the inputs app.py's form sends")
+parser.add_argument("--score-table-samples", type=int, default=20000,
+                    help="Random inputs used to measure the score table's error")
+parser.add_argument("--score-table-max-error", type=float, default=0.1,
+                    help="Largest observed error at which app.py will still serve the score table")
+parser.add_argument("--eval-jobs", type=int, default=-1,
+                    help="Worker processes for the evaluation report (-1 = all cores)")
+parser.add_argument("--bootstrap", type=int, default=1000,
+                    help="Bootstrap resamples for the evaluation confidence intervals")
+parser.add_argument("--seed", type=int, default=42,
+                    help="Seed for the evaluation report")
+args = parser.parse_args()
 
 # Load the dataset
-data = pd.read_csv(r"C:\Users\ASUS\Downloads\adult 3.csv")
+data = pd.read_csv(args.data)
 
 
 # Clean column names
@@ -26,12 +60,18 @@ categorical_cols = [
 # Initialize label encoder
 encoder = LabelEncoder()
 
-# Encode all categorical columns
+# Encode all categorical columns, remembering each column's classes
+category_classes = {}
 for col in categorical_cols:
     data[col] = encoder.fit_transform(data[col])
+    category_classes[col] = encoder.classes_.tolist()
+
+# Every form option must map onto a category present in the data
+check_mapping(category_classes)
 
 # Encode the target column
 data['income'] = encoder.fit_transform(data['income'])
+income_classes = encoder.classes_.tolist()
 
 # Split into features and target
 X = data.drop('income', axis=1)
@@ -40,17 +80,246 @@ y = data['income']
 # Split into training and testing sets (80% train, 20% test)
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
+
+# Available model engines
+def build_engine(name):
+    if name == "random_forest":
+        return RandomForestClassifier(n_estimators=100, random_state=42)
+    if name == "hist_gradient_boosting":
+        # Label-encoded categorical columns are handled natively
+        return HistGradientBoostingClassifier(
+            categorical_features=[col in categorical_cols for col in X_train.columns],
+            random_state=42,
+        )
+    raise ValueError(f"Unknown engine: {name}")
+
+
+def benchmark_engine(name):
+    # Fit one engine and measure fit time, size, latency and accuracy
+    model = build_engine(name)
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    artifact_size = len(pickle.dumps({"engine": name, "model": model}))
+
+    # Single-row latency: median over individual test rows
+    single_rows = [X_test.iloc[[i]] for i in range(min(200, len(X_test)))]
+    timings = []
+    for row in single_rows:
+        start = time.perf_counter()
+        model.predict_proba(row)
+        timings.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    model.predict_proba(X_test)
+    batch_time = time.perf_counter() - start
+
+    return model, {
+        "engine": name,
+        "fit_time_s": fit_time,
+        "artifact_size_bytes": artifact_size,
+        "single_row_latency_ms": float(np.median(timings)) * 1000,
+        "batch_latency_s": batch_time,
+        "batch_rows": len(X_test),
+        "accuracy": model.score(X_test, y_test),
+    }
+
+
 # Train the model
-model = RandomForestClassifier(n_estimators=100, random_state=42)
-model.fit(X_train, y_train)
+engines = [args.engine]
+if not args.no_compare:
+    engines = [args.engine] + [e for e in ("random_forest", "hist_gradient_boosting") if e != args.engine]
+
+report = []
+for name in engines:
+    trained, stats = benchmark_engine(name)
+    report.append(stats)
+    if name == args.engine:
+        model = trained
 
 # Evaluate and print accuracy
-accuracy = model.score(X_test, y_test)
+accuracy = report[0]["accuracy"]
 print("✅ Model trained successfully!")
+print("🧠 Engine:", args.engine)
 print("📊 Test Accuracy:", round(accuracy * 100, 2), "%")
 
-# Save the trained model to a file
+# Side-by-side engine report
+if len(report) > 1:
+    print("\n⚖️  Engine comparison")
+    print(f"{'engine':<24} {'fit (s)':>8} {'size (MB)':>10} {'1-row (ms)':>11} {'batch (s)':>10} {'accuracy':>9}")
+    for stats in report:
+        print(f"{stats['engine']:<24} {stats['fit_time_s']:>8.2f} "
+              f"{stats['artifact_size_bytes'] / 1e6:>10.2f} {stats['single_row_latency_ms']:>11.2f} "
+              f"{stats['batch_latency_s']:>10.3f} {stats['accuracy'] * 100:>8.2f}%")
+    with open('engine_report.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    print("📝 Comparison saved as 'engine_report.json'")
+
+# Detailed evaluation report, computed in parallel
+evaluation = evaluate(model, X_test, y_test, category_classes=category_classes,
+                      n_jobs=args.eval_jobs, n_bootstrap=args.bootstrap, seed=args.seed)
+evaluation["engine"] = args.engine
+with open('evaluation_report.json', 'w') as f:
+    json.dump(evaluation, f, indent=2)
+for metric, ci in evaluation["bootstrap"]["intervals"].items():
+    if ci["lower"] is None:
+        print(f"📊 {metric}: {ci['estimate']:.4f} (no CI: undefined on every resample)")
+        continue
+    print(f"📊 {metric}: {ci['estimate']:.4f} "
+          f"({evaluation['bootstrap']['confidence'] * 100:.0f}% CI {ci['lower']:.4f}-{ci['upper']:.4f})")
+print(f"⏱️  Evaluation took {evaluation['timings_s']['parallel_wall']:.1f}s")
+print("📝 Evaluation saved as 'evaluation_report.json'")
+
+# Headline test metrics shown by app.py
+metrics = {
+    "accuracy": accuracy,
+    "precision": evaluation["classification"]["precision"],
+    "recall": evaluation["classification"]["recall"],
+    "f1": evaluation["classification"]["f1"],
+    "roc_auc": evaluation["curves"]["roc_auc"],
+}
+
+# Save the trained model to a file, tagged with its engine
 with open('model.pkl', 'wb') as f:
-    pickle.dump(model, f)
+    pickle.dump({"engine": args.engine, "model": model, "categories": category_classes,
+                 "label_names": income_classes, "metrics": metrics}, f)
 
 print("🎉 Model saved as 'model.pkl'")
+
+# Fingerprint of the saved model; side artifacts record it so the app can
+# reject ones left over from an earlier training run
+with open('model.pkl', 'rb') as f:
+    model_sha256 = hashlib.sha256(f.read()).hexdigest()
+
+# Build the similar-profile index over scaled, encoded training features
+if not args.no_neighbors:
+    scaler = StandardScaler().fit(X_train)
+    scaled = scaler.transform(X_train)
+    # One tree per set of form inputs that may lack a training equivalent, built
+    # without those columns, so app.py never has to build a tree per request
+    optional = optional_columns()
+    trees = {}
+    for r in range(len(optional) + 1):
+        for excluded in itertools.combinations(optional, r):
+            keep = [i for i, col in enumerate(X_train.columns) if col not in excluded]
+            trees[excluded] = BallTree(scaled[:, keep], leaf_size=40)
+    # Stored uncompressed so app.py can memory-map the arrays
+    joblib.dump({
+        "trees": trees,
+        "optional_columns": optional,
+        "mean": scaler.mean_,
+        "scale": scaler.scale_,
+        "rows": X_train.to_numpy(),
+        "columns": list(X_train.columns),
+        "labels": y_train.to_numpy(),
+        "label_names": income_classes,
+        "categories": category_classes,
+        "model_sha256": model_sha256,
+    }, 'neighbors.joblib')
+    print("🧭 Similar-profile index saved as 'neighbors.joblib'")
+
+def score_table_axes():
+    # One axis per model feature. Categorical axes hold the training codes of
+    # every form option (the full cross-product is ~324k combinations), so the
+    # numeric inputs are bucketed coarsely to keep the table around 10 MB.
+    numeric_edges = {
+        'age': np.array([17, 30, 45, 60, 91]),                  # slider 17-90
+        'educational-num': np.array([1, 13, 21]),               # slider 1-20
+        'hours-per-week': np.array([10, 40, 101]),              # slider 10-100
+        'fnlwgt': np.array([X_train['fnlwgt'].min(), X_train['fnlwgt'].max() + 1]),
+        'capital-gain': np.array([0, 1]),                       # only the default of 0
+        'capital-loss': np.array([0, 1]),                       # only the default of 0
+    }
+    axes = []
+    for col in X_train.columns:
+        if col in categorical_cols:
+            codes = sorted({training_code(col, option, category_classes[col]) for option in FORM_OPTIONS[col]})
+            axes.append({"feature": col, "kind": "categorical", "codes": codes})
+        else:
+            edges = numeric_edges[col]
+            # Evaluate each bucket at the median training value inside it
+            points = []
+            for lo, hi in zip(edges[:-1], edges[1:]):
+                inside = X_train[col][(X_train[col] >= lo) & (X_train[col] < hi)]
+                points.append(int(inside.median()) if len(inside) else int((lo + hi - 1) // 2))
+            axes.append({"feature": col, "kind": "numeric", "edges": edges, "points": np.array(points)})
+    return axes
+
+
+def axis_values(axis):
+    return np.array(axis["codes"]) if axis["kind"] == "categorical" else axis["points"]
+
+
+def build_score_table(model, chunk_rows=200000):
+    axes = score_table_axes()
+    shape = tuple(len(axis_values(axis)) for axis in axes)
+    values = [axis_values(axis) for axis in axes]
+    probabilities = np.empty(int(np.prod(shape)), dtype=np.float16)
+
+    # Evaluate the model over the full grid in bounded chunks
+    for start in range(0, probabilities.size, chunk_rows):
+        flat = np.arange(start, min(start + chunk_rows, probabilities.size))
+        grid_index = np.unravel_index(flat, shape)
+        grid = pd.DataFrame({axis["feature"]: values[i][grid_index[i]] for i, axis in enumerate(axes)})
+        probabilities[flat] = model.predict_proba(grid)[:, 1]
+    probabilities = probabilities.reshape(shape)
+
+    # Measure the table against the exact model on random in-range inputs:
+    # form options drawn uniformly, numeric values drawn from the test set.
+    # This is an empirical check, not a bound: the observed maximum is the
+    # largest error seen over these samples, and unsampled inputs may exceed it.
+    rng = np.random.default_rng(42)
+    n = args.score_table_samples
+    sample = {}
+    for i, axis in enumerate(axes):
+        if axis["kind"] == "categorical":
+            sample[axis["feature"]] = values[i][rng.integers(0, shape[i], size=n)]
+        else:
+            edges = axis["edges"]
+            in_range = X_test[axis["feature"]]
+            in_range = in_range[(in_range >= edges[0]) & (in_range < edges[-1])].to_numpy()
+            sample[axis["feature"]] = rng.choice(in_range, size=n)
+    sample = pd.DataFrame(sample)
+    exact = model.predict_proba(sample)[:, 1]
+    approx = np.array([lookup_cell(probabilities, axes, row) for row in sample.itertuples(index=False)])
+    errors = np.abs(exact - approx)
+
+    return {
+        "engine": args.engine,
+        "model_sha256": model_sha256,
+        "axes": axes,
+        "probabilities": probabilities,
+        "error_samples": n,
+        "observed_max_abs_error": float(errors.max()),
+        "p99_abs_error": float(np.quantile(errors, 0.99)),
+        "mean_abs_error": float(errors.mean()),
+        "decision_agreement": float(((exact > 0.5) == (approx > 0.5)).mean()),
+        "max_error_tolerance": args.score_table_max_error,
+    }
+
+
+def lookup_cell(probabilities, axes, row):
+    # Same cell lookup app.py performs for an in-range input
+    cell = []
+    for axis, value in zip(axes, row):
+        if axis["kind"] == "categorical":
+            cell.append(axis["codes"].index(int(value)))
+        else:
+            cell.append(int(np.searchsorted(axis["edges"], value, side="right")) - 1)
+    return float(probabilities[tuple(cell)])
+
+
+# Precompute scores for the discrete form input space
+if args.score_table:
+    table = build_score_table(model)
+    joblib.dump(table, 'score_table.joblib')
+    print(f"🗂️  Score table: {table['probabilities'].size:,} cells, "
+          f"{table['probabilities'].nbytes / 1e6:.1f} MB")
+    print(f"📏 Observed max abs error vs model: {table['observed_max_abs_error']:.4f} "
+          f"(p99 {table['p99_abs_error']:.4f}, decision agreement {table['decision_agreement'] * 100:.2f}%, "
+          f"{table['error_samples']:,} samples)")
+    if table['observed_max_abs_error'] > table['max_error_tolerance']:
+        print(f"⚠️  Observed error exceeds --score-table-max-error {table['max_error_tolerance']}; "
+              "app.py will not serve this table")
+    print("🎉 Score table saved as 'score_table.joblib'")